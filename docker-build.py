@@ -15,29 +15,61 @@
 # limitations under the License.
 
 import argparse
+import contextlib
 import datetime
 import docker
-import gzip
+import functools
 import os
 import re
 import sys
 import tarfile
 import tempfile
-import textwrap
+import threading
 import yaml
-from io import BytesIO
-from jinja2 import Environment, Template
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO, StringIO
+from jinja2 import Environment
 from jinja2.loaders import FileSystemLoader
 from jinja2.exceptions import TemplateNotFound
 from jinja2.runtime import StrictUndefined
 from jinja2.meta import find_undeclared_variables
-from docker.utils.json_stream import json_stream
+from yaml.constructor import SafeConstructor
+from yaml.nodes import ScalarNode
+from yaml.resolver import Resolver
 from docker.utils.build import exclude_paths
 from docker.utils import mkbuildcontext
+from docker.constants import DEFAULT_MAX_POOL_SIZE
 from docker.errors import BuildError, DockerException
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    # libyaml bindings not available, use the pure python loader
+    from yaml import SafeLoader as YamlLoader
+
+try:
+    import ryml
+except ImportError:
+    # rapidyaml not available, only use PyYAML
+    ryml = None
+
+try:
+    from isal import igzip as gzip
+except ImportError:
+    # isal not available, use the zlib based gzip module
+    import gzip
+
 __version__ = "1.2.0"
 
+# shared environment for rendering templates, so compiled templates can be
+# reused between renders
+_ENV = Environment(undefined=StrictUndefined)
+# tag templates render undefined variables as empty strings
+_TAG_ENV = Environment()
+
+# number of parallel requests used to tag an image
+TAG_JOBS = 8
+
 class Utils(object):
     @staticmethod
     def merge_dict(a, b, path=[]):
@@ -57,29 +89,132 @@ class Utils(object):
         return result
 
     @staticmethod
-    def render_template(template, variables={}, env=None):
-        if not env:
-            _env = Environment(undefined=StrictUndefined)
-        else:
-            _env = env
+    def merge_into(a, b):
+        """Deep merges b into a in place and returns a"""
+        for key, value in b.items():
+            if (key in a and isinstance(a[key], dict)
+                    and isinstance(value, dict)):
+                Utils.merge_into(a[key], value)
+            else:
+                a[key] = value
+        return a
+
+    @staticmethod
+    def load_yaml(path):
+        """Loads the YAML file at path, using rapidyaml if available"""
+        with open(path, 'rb') as stream:
+            if ryml:
+                data = stream.read()
+                # merge keys are resolved differently by rapidyaml
+                if b'<<' not in data:
+                    try:
+                        with Utils.suppress_stderr():
+                            return Utils.load_ryml(data)
+                    except Exception:
+                        # let PyYAML load (or report errors of) unsupported
+                        # files
+                        pass
+                stream.seek(0)
+            # load from the file object, so errors contain the file name
+            return yaml.load(stream, Loader=YamlLoader)
+
+    @staticmethod
+    @contextlib.contextmanager
+    def suppress_stderr():
+        """Silences output written directly to the stderr file descriptor,
+        e.g. the parse errors rapidyaml prints"""
+        sys.stderr.flush()
+        stderr = os.dup(2)
+        with open(os.devnull, 'w') as devnull:
+            os.dup2(devnull.fileno(), 2)
+        try:
+            yield
+        finally:
+            os.dup2(stderr, 2)
+            os.close(stderr)
+
+    @staticmethod
+    def load_ryml(data):
+        """Parses YAML with rapidyaml, resolving scalars like PyYAML"""
+        tree = ryml.parse_in_arena(data)
+        tree.resolve()
+        resolver = Resolver()
+        constructor = SafeConstructor()
+
+        def scalar(value, plain):
+            value = bytes(value).decode('utf-8')
+            if plain:
+                tag = resolver.resolve(ScalarNode, value, (True, False))
+            else:
+                tag = 'tag:yaml.org,2002:str'
+            return constructor.construct_object(ScalarNode(tag, value))
+
+        def load(node):
+            if tree.has_val_tag(node) or (tree.has_key(node)
+                                          and tree.has_key_tag(node)):
+                raise ValueError('YAML tags are not supported')
+            if tree.is_map(node):
+                return {
+                    scalar(tree.key(child), tree.is_key_plain(child)):
+                    load(child)
+                    for child in ryml.children(tree, node)
+                }
+            if tree.is_seq(node):
+                return [load(child) for child in ryml.children(tree, node)]
+            if tree.val_is_null(node):
+                return None
+            return scalar(tree.val(node), tree.is_val_plain(node))
+
+        root = tree.root_id()
+        if tree.is_stream(root):
+            documents = list(ryml.children(tree, root))
+            if len(documents) != 1:
+                raise ValueError('expected a single YAML document')
+            root = documents[0]
+        elif not tree.has_children(root) and not tree.has_val(root):
+            # empty file
+            return None
+        return load(root)
+
+    @staticmethod
+    def render_template(template, variables={}, env=None, depth=2):
+        """Renders template, rendering the output again if it still contains
+        variables (e.g. from nested variables), in at most depth passes"""
+        _env = env or _ENV
 
         data = template.render(variables)
+        if depth <= 1 or ('{{' not in data and '{%' not in data):
+            return data
 
         ast = _env.parse(data)
         if find_undeclared_variables(ast):
             _template = _env.from_string(ast)
-            return Utils.render_template(_template, variables, _env)
+            return Utils.render_template(_template, variables, _env, depth - 1)
         else:
             return data
 
+    # creates the build context as tar file in a single pass, containing the
+    # files of the root directory, the files of the variant directory and the
+    # rendered Dockerfile. Like docker-py's create_archive, the context is
+    # written to a temporary file instead of being held in memory.
+    @staticmethod
+    def build_context(root, files, variant_root=None, variant_files=[],
+                      dockerfile=''):
+        fileobj = tempfile.TemporaryFile()
+        # copy file contents in 1 MiB chunks instead of the default 16 KiB
+        t = tarfile.open(mode='w', fileobj=fileobj, copybufsize=1 << 20)
+        Utils.tar(t, root, files)
+        if variant_root:
+            Utils.tar(t, variant_root, variant_files)
+        Utils.tar_dockerfile(t, dockerfile)
+        t.close()
+        fileobj.seek(0)
+        return fileobj
+
     # based on create_archive https://github.com/docker/docker-py/blob/master/docker/utils/utils.py
+    # adds the given files of root to the open tar file t
     @staticmethod
-    def tar(root, files, fileobj=None):
-        mode = 'a'
-        if not fileobj:
-            fileobj = tempfile.NamedTemporaryFile()
-            mode = 'w'
-        t = tarfile.open(mode=mode, fileobj=fileobj)
+    def tar(t, root, files):
         for path in files:
             i = t.gettarinfo(os.path.join(root, path), arcname=path)
             if i is None:
@@ -87,6 +222,11 @@ class Utils(object):
                 # ignore it and proceed.
                 continue
 
+            if not (i.isreg() and i.size):
+                # Directories, links and empty files have no content to copy.
+                t.addfile(i, None)
+                continue
+
             try:
                 # We open the file object in binary mode for Windows support.
                 with open(os.path.join(root, path), 'rb') as f:
@@ -94,25 +234,16 @@ class Utils(object):
             except IOError:
                 # When we encounter a directory the file object is set to None.
                 t.addfile(i, None)
-        t.close()
-        fileobj.seek(0)
-        return fileobj
 
     # based on mkbuildcontext
     #   https://github.com/docker/docker-py/blob/master/docker/utils/utils.py
-    # appends the string given in dockerfile as Dockerfile to the tar file
-    # provided as # fileobj in tarfileobj
+    # adds the string given in dockerfile as Dockerfile to the open tar file t
     @staticmethod
-    def tar_dockerfile(dockerfile,tarfileobj):
+    def tar_dockerfile(t, dockerfile):
         dockerfileobj = BytesIO(dockerfile.encode('utf-8'))
-        t = tarfile.open(mode='a', fileobj=tarfileobj)
         dfinfo = tarfile.TarInfo('Dockerfile')
         dfinfo.size = len(dockerfileobj.getvalue())
-        dockerfileobj.seek(0)
         t.addfile(dfinfo, dockerfileobj)
-        t.close()
-        tarfileobj.seek(0)
-        return tarfileobj
 
 class TagCandidate(object):
     def __init__(self,
@@ -122,14 +253,17 @@ class TagCandidate(object):
                  negate=False):
         self.template = template
         self.selectors = selectors
+        self._selectors = [re.compile(selector) for selector in selectors]
         self.negate = negate
         self.only_primary = only_primary
+        # compile once, the template is rendered for every source tag
+        self._template = _TAG_ENV.from_string(template)
 
     def selected(self, select=None, primary=False):
         if primary or (primary == self.only_primary):
-            if select and self.selectors:
-                for selector in self.selectors:
-                    if re.search(selector, select):
+            if select and self._selectors:
+                for selector in self._selectors:
+                    if selector.search(select):
                         return not self.negate
                 return self.negate
             else:
@@ -138,7 +272,7 @@ class TagCandidate(object):
             return False
 
     def render(self, variables={}):
-        return Utils.render_template(Template(self.template), variables)
+        return Utils.render_template(self._template, variables)
 
 class BuildVariant(object):
     def __init__(self,
@@ -153,11 +287,10 @@ class BuildVariant(object):
         self.directory = directory
 
         try:
-            with open(os.path.join(directory, config_file), 'r') as stream:
-                try:
-                    data = yaml.load(stream)
-                except yaml.YAMLError as e:
-                    print(e)
+            try:
+                data = Utils.load_yaml(os.path.join(directory, config_file))
+            except yaml.YAMLError as e:
+                print(e)
         except (AttributeError, TypeError):
             # no config file name provided
             pass
@@ -165,8 +298,7 @@ class BuildVariant(object):
             # no config file present
             pass
 
-        jinja = Environment(
-            loader=FileSystemLoader(directory), undefined=StrictUndefined)
+        jinja = BuildVariant.environment(directory)
 
         config = Utils.merge_dict({
             'variables': variables,
@@ -180,6 +312,12 @@ class BuildVariant(object):
 
         self.template_file = config['template_file']
 
+        self.dockerignore = []
+        dockerignore = os.path.join(directory, '.dockerignore')
+        if os.path.exists(dockerignore):
+            with open(dockerignore, 'r') as f:
+                self.dockerignore = list(filter(bool, f.read().splitlines()))
+
         self.tags = {}
         for tag in tags + config['tags']:
             self.tags[tag['template']] = TagCandidate(**tag)
@@ -190,20 +328,34 @@ class BuildVariant(object):
         except TemplateNotFound:
             self.template = template
 
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def environment(directory):
+        """Returns a template environment shared by all variants in directory"""
+        return Environment(
+            loader=FileSystemLoader(directory), undefined=StrictUndefined)
+
+    @staticmethod
+    @functools.lru_cache(maxsize=None)
+    def list_files(directory, exclude):
+        """Returns the files in directory not matching the patterns in
+        exclude, shared by all variants in directory"""
+        return sorted(exclude_paths(directory, list(exclude)))
+
     def files(self,exclude=[]):
-        dockerignore = os.path.join(self.directory, '.dockerignore')
-        _exclude = exclude
+        _exclude = list(exclude)
         if self.config_file:
             _exclude.append(self.config_file)
         else:
             _exclude.append('image-build.yml')
         _exclude.append(self.template_file)
+        _exclude += self.dockerignore
 
-        if os.path.exists(dockerignore):
-            with open(dockerignore, 'r') as f:
-                _exclude += list(filter(bool, f.read().splitlines()))
+        # drop duplicate patterns, keeping the last occurrence as the last
+        # matching pattern decides whether a path is excluded
+        _exclude = list(reversed(list(dict.fromkeys(reversed(_exclude)))))
 
-        return sorted(exclude_paths(self.directory, _exclude))
+        return BuildVariant.list_files(self.directory, tuple(_exclude))
 
     def render_dockerfile(self, variables):
         return Utils.render_template(self.template,
@@ -212,10 +364,10 @@ class BuildVariant(object):
 
     def render_tags(self, variables, select=None, primary=False):
         tags = []
+        _variables = Utils.merge_dict(self.variables, variables)
         for tag in self.tags:
             if self.tags[tag].selected(select, primary):
-                tags.append(self.tags[tag].render(
-                    Utils.merge_dict(self.variables, variables)))
+                tags.append(self.tags[tag].render(_variables))
         return tags
 
 
@@ -266,14 +418,16 @@ class Builder(object):
         self.save = args['save']
         self.dry_run = args['dry_run']
         self.ignore_empty = args['ignore_empty']
-        self.builder = docker.from_env()
+        self.jobs = args['jobs']
+        # keep a connection for every parallel request
+        self.builder = docker.from_env(
+            max_pool_size=max(DEFAULT_MAX_POOL_SIZE, self.jobs * TAG_JOBS))
 
         build_config = {}
-        with open(args['file'], 'r') as stream:
-            try:
-                build_config = yaml.load(stream)
-            except yaml.YAMLError as e:
-                print(e)
+        try:
+            build_config = Utils.load_yaml(args['file'])
+        except yaml.YAMLError as e:
+            print(e)
 
         self.builds = []
 
@@ -284,46 +438,64 @@ class Builder(object):
             self.builds.append(
                 Build(root_dir=os.path.dirname(args['file']), **config))
 
-    def build_image(self, dockerfileobj):
-
-        response = []
-        print("  Docker build output:")
-        for line in self.builder.api.build(fileobj=dockerfileobj, rm=True, custom_context=True):
-            response.append(line)
-            event = list(json_stream([line]))[0]
-            if 'stream' in event:
-                print("    " + event['stream'].rstrip())
-            elif 'status' in event:
-                print("    " + event['status'].rstrip())
-            elif 'error' in event:
-                raise BuildError(event['error'], json_stream(response))
-
-        events = list(json_stream(response))
-        if not events:
-            raise BuildError('Unknown build error',events)
-        event = events[-1]
-        if 'stream' in event:
-            match = re.search(r'Successfully built ([0-9a-f]+)',
-                              event.get('stream', ''))
-            if match:
-                image_id = match.group(1)
-        if image_id:
-            return image_id
-        raise BuildError(event, events)
+    def build_image(self, dockerfileobj, out=sys.stdout):
+
+        event = None
+        last_stream = None
+        lines = []
+        print("  Docker build output:", file=out)
+        try:
+            for event in self.builder.api.build(fileobj=dockerfileobj,
+                                                rm=True, custom_context=True,
+                                                decode=True):
+                if 'stream' in event:
+                    last_stream = event['stream']
+                    lines.append("    " + event['stream'].rstrip() + "\n")
+                elif 'status' in event:
+                    lines.append("    " + event['status'].rstrip() + "\n")
+                elif 'error' in event:
+                    raise BuildError(event['error'], [event])
+                # write the output in batches, but show new build steps
+                # right away
+                if (len(lines) >= 64
+                        or (lines and lines[-1].startswith('    Step '))):
+                    out.write(''.join(lines))
+                    del lines[:]
+        finally:
+            # also write the output explaining a failed build
+            out.write(''.join(lines))
+
+        if event is None:
+            raise BuildError('Unknown build error', [])
+        match = re.search(r'Successfully built ([0-9a-f]+)', last_stream or '')
+        if match:
+            return match.group(1)
+        raise BuildError(event, [event])
 
     def save_image(self, repository):
-        image_data = self.builder.api.get_image(repository)
-        with gzip.open("%s.tar.gz" % repository.replace('/', '_'), 'wb') as f:
+        image_data = self.builder.api.get_image(repository,
+                                                chunk_size=4 * 1024 * 1024)
+        # image layers are stored uncompressed in the image tar, favour speed
+        # over size when compressing them
+        with gzip.open("%s.tar.gz" % repository.replace('/', '_'), 'wb',
+                       compresslevel=1) as f:
             for chunk in image_data:
                 f.write(chunk)
 
-    def push_image(self, repository, tag=None):
-        print("  Docker push output:")
-        for line in self.builder.api.push(
-                repository=repository, tag=tag, stream=True):
-            event = list(json_stream([line]))[0]
+    def tag_image(self, image, repository, tags):
+        # skip tags already pointing to the image
+        tags = [tag for tag in tags
+                if '%s:%s' % (repository, tag) not in image.tags]
+        with ThreadPoolExecutor(max_workers=TAG_JOBS) as executor:
+            list(executor.map(lambda tag: image.tag(repository, tag=tag),
+                              tags))
+
+    def push_image(self, repository, tag=None, out=sys.stdout):
+        print("  Docker push output:", file=out)
+        for event in self.builder.api.push(
+                repository=repository, tag=tag, stream=True, decode=True):
             if 'status' in event:
-                print("    " + event['status'])
+                print("    " + event['status'], file=out)
             elif 'error' in event:
                 raise DockerException(event['error'])
 
@@ -333,91 +505,138 @@ class Builder(object):
             root_excludes.append(build.variants_dir)
             root_excludes.append(build.variants['.'].template_file)
 
-        for build in self.builds:
-            timestamp = '{:%Y%m%d%H%M%S}'.format(datetime.datetime.now())
-            repository = os.path.join(build.namespace, build.name)
-            print("Build: {0}".format(build.name))
-            print("  Repository: {0}\n".format(repository))
+        if self.jobs == 1:
+            # build in the main thread, so the builds can be interrupted
+            for build in self.builds:
+                if not self.run_build(build, root_excludes):
+                    return False
+            return True
+
+        failed = threading.Event()
+
+        def run(build):
+            # do not start any further builds once a build failed
+            if failed.is_set():
+                return '', None
+            # buffer the output so parallel builds do not interleave
+            out = StringIO()
+            error = None
             try:
-                has_applicable_tags = False
-                for source_tag in build.source['tags']:
-                    build_variables = self.variables
-                    primary = source_tag == build.source['primary']
-                    build_variables['_source'] = { 'name': build.source['name'], 'tag': source_tag, 'primary': primary }
-                    build_variables['_dest'] = { 'name': build.name, 'namespace': build.namespace }
-                    build_variables['_timestamp'] = timestamp
-                    tags = build.variants['.'].render_tags(build_variables,
-                                                           self.select, primary)
+                if not self.run_build(build, root_excludes, out):
+                    failed.set()
+            except Exception as err:
+                # raised once the output of all started builds is written
+                failed.set()
+                error = err
+            return out.getvalue(), error
+
+        errors = []
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            futures = [executor.submit(run, build) for build in self.builds]
+            try:
+                for future in futures:
+                    if future.cancelled():
+                        continue
+                    output, error = future.result()
+                    sys.stdout.write(output)
+                    if error:
+                        errors.append(error)
+                    if failed.is_set():
+                        executor.shutdown(wait=False, cancel_futures=True)
+            except BaseException:
+                # e.g. KeyboardInterrupt, do not start the queued builds
+                failed.set()
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+        if errors:
+            raise errors[0]
+        return not failed.is_set()
+
+    def run_build(self, build, root_excludes, out=sys.stdout):
+        timestamp = '{:%Y%m%d%H%M%S}'.format(datetime.datetime.now())
+        repository = os.path.join(build.namespace, build.name)
+        print("Build: {0}".format(build.name), file=out)
+        print("  Repository: {0}\n".format(repository), file=out)
+        try:
+            has_applicable_tags = False
+            # the same for all source tags
+            root_files = build.variants['.'].files(root_excludes)
+            variables = dict(self.variables)
+            variables['_timestamp'] = timestamp
+            for source_tag in build.source['tags']:
+                primary = source_tag == build.source['primary']
+                build_variables = Utils.merge_into(dict(variables), {
+                    '_source': { 'name': build.source['name'], 'tag': source_tag, 'primary': primary },
+                    '_dest': { 'name': build.name, 'namespace': build.namespace }
+                })
+                tags = build.variants['.'].render_tags(build_variables,
+                                                       self.select, primary)
+                build_variables['_dest']['tags'] = tags
+                dockerfile = build.variants['.'].render_dockerfile(
+                    build_variables)
+
+                variant_dir = None
+                files = []
+                if source_tag in build.variants:
+                    tags = build.variants[source_tag].render_tags(
+                        build_variables, self.select, primary)
                     build_variables['_dest']['tags'] = tags
-                    dockerfile = build.variants['.'].render_dockerfile(
+                    build_variables['_base'] = dockerfile
+                    dockerfile = build.variants[source_tag].render_dockerfile(
                         build_variables)
-                    root_files = build.variants['.'].files(root_excludes)
-
-                    if not self.dry_run:
-                        context = Utils.tar(build.variants['.'].directory,root_files)
-
-                    files = []
-                    if source_tag in build.variants:
-                        tags = build.variants[source_tag].render_tags(
-                            build_variables, self.select, primary)
-                        build_variables['_dest']['tags'] = tags
-                        build_variables['_base'] = dockerfile
-                        dockerfile = build.variants[source_tag].render_dockerfile(
-                            build_variables)
-                        files = build.variants[source_tag].files()
-                        if not self.dry_run:
-                            context = Utils.tar(build.variants[source_tag].directory,files,context)
-                    if not self.dry_run:
-                        context = Utils.tar_dockerfile(dockerfile,context)
-
-                    if self.dry_run:
-                        print("  Source: %s:%s" % (build.source['name'],
-                                                   source_tag))
-                        print("    Tags:")
-                        print('\n'.join('      ' + tag for tag in tags))
-                        print("    Base files:")
-                        print('\n'.join('      ' + f for f in root_files))
-                        print("    Variant files:")
-                        print('\n'.join('      ' + f for f in files))
-                        print('    Dockerfile:')
-                        print(''.join('      ' + line
-                                      for line in dockerfile.splitlines(True)))
-                        print
-                    else:
-                        if len(tags) > 0:
-                            image_id = self.build_image(context)
-                            image = self.builder.images.get(image_id)
-                            for tag in tags:
-                                image.tag(repository, tag=tag)
-                            has_applicable_tags = True
-                        else:
-                            print(
-                                "  No applicable destination tags for source tag %s, skipping build phase"
-                                % source_tag)
-
-                if has_applicable_tags:
-                    if self.push and not self.dry_run:
-                        try:
-                            self.push_image(repository)
-                        except DockerException as err:
-                            print("Failed to push image: {0}".format(err))
-                            return False
-                    if self.save and not self.dry_run:
-                        try:
-                            self.save_image(repository)
-                        except Exception as err:
-                            print("Failed to push image: {0}".format(err))
-                            return False
+                    variant_dir = build.variants[source_tag].directory
+                    files = build.variants[source_tag].files()
+
+                if self.dry_run:
+                    print("  Source: %s:%s" % (build.source['name'],
+                                               source_tag), file=out)
+                    print("    Tags:", file=out)
+                    print('\n'.join('      ' + tag for tag in tags), file=out)
+                    print("    Base files:", file=out)
+                    print('\n'.join('      ' + f for f in root_files), file=out)
+                    print("    Variant files:", file=out)
+                    print('\n'.join('      ' + f for f in files), file=out)
+                    print('    Dockerfile:', file=out)
+                    print(''.join('      ' + line
+                                  for line in dockerfile.splitlines(True)),
+                          file=out)
+                    print
                 else:
-                    if not self.ignore_empty:
-                        print("The build has no applicable destination for any source tag!")
+                    if len(tags) > 0:
+                        with Utils.build_context(
+                                build.variants['.'].directory, root_files,
+                                variant_dir, files, dockerfile) as context:
+                            image_id = self.build_image(context, out)
+                        image = self.builder.images.get(image_id)
+                        self.tag_image(image, repository, tags)
+                        has_applicable_tags = True
+                    else:
+                        print(
+                            "  No applicable destination tags for source tag %s, skipping build phase"
+                            % source_tag, file=out)
+
+            if has_applicable_tags:
+                if self.push and not self.dry_run:
+                    try:
+                        self.push_image(repository, out=out)
+                    except DockerException as err:
+                        print("Failed to push image: {0}".format(err), file=out)
                         return False
-            except BuildError as err:
-                print("Failed to build image: {0}".format(err))
-                return False
+                if self.save and not self.dry_run:
+                    try:
+                        self.save_image(repository)
+                    except Exception as err:
+                        print("Failed to push image: {0}".format(err), file=out)
+                        return False
+            else:
+                if not self.ignore_empty:
+                    print("The build has no applicable destination for any source tag!", file=out)
+                    return False
+        except BuildError as err:
+            print("Failed to build image: {0}".format(err), file=out)
+            return False
         return True
 
-
 class StoreNameValuePair(argparse.Action):
     def __call__(self, parser, namespace, values, option_string=None):
         try:
@@ -427,6 +646,14 @@ class StoreNameValuePair(argparse.Action):
             raise ValueError('Arguments must have the format KEY=VALUE')
 
 
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(
+            'must be a positive number: {0}'.format(value))
+    return number
+
+
 parser = argparse.ArgumentParser(description='Docker image build helper.')
 parser.add_argument(
     '--dry-run',
@@ -460,6 +687,13 @@ parser.add_argument(
     metavar='file',
     default='image-build.yml',
     help='name of the build file')
+parser.add_argument(
+    '--jobs',
+    '-j',
+    metavar='N',
+    default=1,
+    type=positive_int,
+    help='number of builds to run in parallel')
 parser.add_argument(
     '--select',
     '-s',
@@ -18,6 +18,7 @@ import argparse
 import docker
 import re
 import sys
+from image_filters import reference_filters
 
 parser = argparse.ArgumentParser(
     description='Check number of present docker images')
@@ -48,14 +49,16 @@ parser.add_argument(
     'Number of matched tags must be at least, not more than or equal to the number of expected tags'
 )
 args = vars(parser.parse_args())
+regex = re.compile(args['regex'])
 
 client = docker.from_env()
 found = [] 
-for image in client.images.list():
+for image in client.images.list(
+        filters=reference_filters(args['regex'], args['negate'])):
     tags = image.tags
     if not tags: tags = ['']
     for tag in tags:
-        if not (bool(re.search(args['regex'], tag)) == args['negate']):
+        if not (bool(regex.search(tag)) == args['negate']):
             found.append(tag)
 
 found.sort()
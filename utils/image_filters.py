@@ -0,0 +1,35 @@
+#
+# Copyright 2017 Bedag Informatik AG.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import re
+
+
+def reference_filters(pattern, negate=False):
+    """Returns image list filters to let the daemon preselect the images
+    matching pattern, if it starts with a literal repository name"""
+    match = re.match(r'\^((?:[\w/:-]|\\[.:/-])+)(.?)', pattern)
+    if negate or '|' in pattern or not match:
+        return {}
+    prefix = match.group(1).replace('\\', '')
+    if match.group(2) in ('?', '*', '{'):
+        # the last character is optional
+        prefix = prefix[:-1]
+    name, _, tag = prefix.rpartition(':')
+    if '/' not in name or '/' in tag:
+        # '*' does not match '/' in reference filters, only use the filter
+        # if the prefix contains the complete repository name (the ':' of
+        # a name without '/' might also be the port of a registry)
+        return {}
+    return {'reference': prefix + '*'}
@@ -17,6 +17,9 @@
 import argparse
 import docker
 import re
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from image_filters import reference_filters
 
 parser = argparse.ArgumentParser(
     description='Remove all tags matching a given regex')
@@ -33,15 +36,26 @@ parser.add_argument(
     action='store_true',
     help='Invert the regexp')
 args = vars(parser.parse_args())
+regex = re.compile(args['regex'])
 
 client = docker.from_env()
 images = client.images
-for image in images.list():
+found = defaultdict(list)
+for image in images.list(
+        filters=reference_filters(args['regex'], args['negate'])):
     tags = image.tags
     if not tags: tags = ['']
     for tag in tags:
-        if not (bool(re.search(args['regex'], tag)) == args['negate']):
-            if tag:
-                images.remove(image=tag, force=True)
-            else:
-                images.remove(image=image.id, force=True)
+        if not (bool(regex.search(tag)) == args['negate']):
+            found[image.id].append(tag or image.id)
+
+
+def remove(names):
+    for name in names:
+        images.remove(image=name, force=True)
+
+# remove the images in parallel, every removal is a request to the daemon.
+# The tags of one image are removed in order, as the image is only deleted
+# with the removal of its last tag.
+with ThreadPoolExecutor(max_workers=16) as executor:
+    list(executor.map(remove, found.values()))